@@ -1,42 +1,82 @@
 """Circuit API."""
 
+import os
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
-from starlette.responses import FileResponse
+import orjson
+from fastapi import APIRouter, BackgroundTasks, Depends, Query
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
 
 import app.jobs
 import app.serialize
 import app.service
-from app.dependencies import CircuitRefDep, UserContextDep, make_temp_path
+from app.config import settings
+from app.dependencies import (
+    CircuitConfigPathDep,
+    UserContextDep,
+    check_etag,
+    circuit_etag,
+    make_temp_file,
+    make_temp_file_path,
+    remove_file,
+)
 from app.schemas import CircuitRef, QueryParams, SampleParams
 
 router = APIRouter()
 
 
+def _json_response(content: dict, response: Response) -> Response:
+    """Return the content serialized with orjson, with the headers set on the injected response.
+
+    Returning a Response skips the validation and the conversion of the content by FastAPI,
+    that would be slow with large contents (e.g. the unique values of some attributes).
+    The headers set on the injected response (e.g. ETag) need to be copied, or they are lost.
+    """
+    return Response(
+        content=orjson.dumps(content),
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
+
+
 @router.get("")
 def read_circuit(
+    request: Request,
     user_context: UserContextDep,
     params: Annotated[QueryParams, Depends(QueryParams.from_simplified_params)],
-    tmp_path: Annotated[Path, Depends(make_temp_path(prefix="output_"))],
-) -> FileResponse:
+    output_path: Annotated[Path, Depends(make_temp_file_path(prefix="output_"))],
+    background_tasks: BackgroundTasks,
+) -> Response:
     """Return information about a circuit (cacheable)."""
-    return query(user_context=user_context, params=params, tmp_path=tmp_path)
+    circuit_ref = CircuitRef.from_params(circuit_id=params.circuit_id)
+    path = app.service.get_circuit_config_path(circuit_ref, user_context=user_context)
+    etag = check_etag(request, path)
+    response = query(
+        user_context=user_context,
+        params=params,
+        output_path=output_path,
+        background_tasks=background_tasks,
+    )
+    if etag:
+        response.headers["ETag"] = etag
+    return response
 
 
 @router.post("/query")
 def query(
     user_context: UserContextDep,
     params: QueryParams,
-    tmp_path: Annotated[Path, Depends(make_temp_path(prefix="output_"))],
-) -> FileResponse:
+    output_path: Annotated[Path, Depends(make_temp_file_path(prefix="output_"))],
+    background_tasks: BackgroundTasks,
+) -> Response:
     """Return information about a circuit."""
     circuit_ref = CircuitRef.from_params(circuit_id=params.circuit_id)
     content_type = app.serialize.get_content_type(params.how)
     extension = app.serialize.get_extension(params.how)
-    output_path = tmp_path / f"output.{extension}"
-    app.jobs.read_circuit_job(
+    filename = f"output.{extension}"
+    content = app.jobs.read_circuit_job(
         user_context=user_context,
         circuit_ref=circuit_ref,
         population_name=params.population_name,
@@ -48,11 +88,23 @@ def query(
         how=params.how,
         use_cache=params.use_cache,
         output_path=output_path,
+        in_memory_max_size=int(settings.RESPONSE_IN_MEMORY_MAX_SIZE_MB * 2**20),
     )
+    if content is not None:
+        # small responses are returned from memory, with the same headers as FileResponse
+        return Response(
+            content,
+            media_type=content_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
+    # the file is created only when the content doesn't fit in memory
+    background_tasks.add_task(remove_file, output_path)
+    # stat the file in the current thread, instead of a new thread from the event loop
     return FileResponse(
         output_path,
         media_type=content_type,
-        filename=output_path.name,
+        filename=filename,
+        stat_result=os.stat(output_path),
     )
 
 
@@ -60,11 +112,10 @@ def query(
 def sample(
     user_context: UserContextDep,
     params: SampleParams,
-    tmp_path: Annotated[Path, Depends(make_temp_path(prefix="output_"))],
+    output_path: Annotated[Path, Depends(make_temp_file(prefix="sampled_", suffix=".h5"))],
 ) -> FileResponse:
     """Sample a node file."""
     circuit_ref = CircuitRef.from_params(circuit_id=params.circuit_id)
-    output_path = tmp_path / f"sampled_{params.sampling_ratio}.h5"
     app.jobs.sample_job(
         user_context=user_context,
         circuit_ref=circuit_ref,
@@ -76,64 +127,65 @@ def sample(
     return FileResponse(
         output_path,
         media_type="application/octet-stream",
-        filename=output_path.name,
+        filename=f"sampled_{params.sampling_ratio}.h5",
+        stat_result=os.stat(output_path),
     )
 
 
-@router.get("/count")
+@router.get("/count", dependencies=[Depends(circuit_etag)], response_model=dict)
 def count(
-    user_context: UserContextDep,
-    circuit_ref: CircuitRefDep,
+    response: Response,
+    path: CircuitConfigPathDep,
     population_name: str | None = None,
-) -> dict:
+) -> Response:
     """Return the number of nodes in a circuit."""
-    path = app.service.get_circuit_config_path(circuit_ref, user_context=user_context)
-    return app.service.count(input_path=path, population_name=population_name)
+    result = app.service.count(input_path=path, population_name=population_name)
+    return _json_response(result, response)
 
 
-@router.get("/attribute_names")
+@router.get("/attribute_names", dependencies=[Depends(circuit_etag)], response_model=dict)
 def get_attribute_names(
-    user_context: UserContextDep,
-    circuit_ref: CircuitRefDep,
+    response: Response,
+    path: CircuitConfigPathDep,
     population_name: str | None = None,
-) -> dict:
+) -> Response:
     """Return the attribute names of a circuit."""
-    path = app.service.get_circuit_config_path(circuit_ref, user_context=user_context)
-    return app.service.get_attribute_names(input_path=path, population_name=population_name)
+    result = app.service.get_attribute_names(input_path=path, population_name=population_name)
+    return _json_response(result, response)
 
 
-@router.get("/attribute_dtypes")
+@router.get("/attribute_dtypes", dependencies=[Depends(circuit_etag)], response_model=dict)
 def get_attribute_dtypes(
-    user_context: UserContextDep,
-    circuit_ref: CircuitRefDep,
+    response: Response,
+    path: CircuitConfigPathDep,
     population_name: str | None = None,
-) -> dict:
+) -> Response:
     """Return the attribute data types of a circuit."""
-    path = app.service.get_circuit_config_path(circuit_ref, user_context=user_context)
-    return app.service.get_attribute_dtypes(input_path=path, population_name=population_name)
+    result = app.service.get_attribute_dtypes(input_path=path, population_name=population_name)
+    return _json_response(result, response)
 
 
-@router.get("/attribute_values")
+@router.get("/attribute_values", dependencies=[Depends(circuit_etag)], response_model=dict)
 def get_attribute_values(
-    user_context: UserContextDep,
-    circuit_ref: CircuitRefDep,
+    response: Response,
+    path: CircuitConfigPathDep,
     population_name: str | None = None,
     attribute_names: Annotated[list[str] | None, Query()] = None,
-) -> dict:
+) -> Response:
     """Return the unique values of the attributes of a circuit."""
-    path = app.service.get_circuit_config_path(circuit_ref, user_context=user_context)
-    return app.service.get_attribute_values(
+    result = app.service.get_attribute_values(
         input_path=path,
         population_name=population_name,
         attribute_names=attribute_names,
     )
+    return _json_response(result, response)
 
 
-@router.get("/node_sets")
+@router.get("/node_sets", dependencies=[Depends(circuit_etag)], response_model=dict)
 def node_sets(
-    user_context: UserContextDep,
-    circuit_ref: CircuitRefDep,
-) -> dict:
+    response: Response,
+    path: CircuitConfigPathDep,
+) -> Response:
     """Return the sorted list of node_sets in a circuit."""
-    path = app.service.get_circuit_config_path(circuit_ref, user_context=user_context)
-    return app.service.get_node_set_names(input_path=path)
+    result = app.service.get_node_set_names(input_path=path)
+    return _json_response(result, response)
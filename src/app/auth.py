@@ -1,47 +1,128 @@
 """Authorization functions."""
 
+import hashlib
+import time
+from threading import Condition
+from typing import Any
+
+import cachetools
 import jwt
+import orjson
 import requests
-from starlette.status import HTTP_200_OK, HTTP_401_UNAUTHORIZED, HTTP_500_INTERNAL_SERVER_ERROR
+from requests.adapters import HTTPAdapter
+from starlette.status import (
+    HTTP_200_OK,
+    HTTP_401_UNAUTHORIZED,
+    HTTP_403_FORBIDDEN,
+    HTTP_500_INTERNAL_SERVER_ERROR,
+)
+from urllib3.util import Retry
 
 from app.config import settings
 from app.logger import L
 from app.schemas import UserContext
 
 
+def _create_http_session() -> requests.Session:
+    """Return a new session, reusing the connections and retrying in case of temporary errors."""
+    retry = Retry(
+        total=settings.KEYCLOAK_MAX_RETRIES,
+        backoff_factor=0.1,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=["GET"],
+        raise_on_status=False,  # return the last response, to be checked by the caller
+    )
+    adapter = HTTPAdapter(pool_maxsize=settings.KEYCLOAK_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_HTTP_SESSION = _create_http_session()
+
+
+def close_http_session() -> None:
+    """Close the connections used to call the Keycloak endpoint."""
+    _HTTP_SESSION.close()
+
+
 def _get_keycloak_acl(credentials: str) -> dict:
     """Call the Keycloak endpoint and return the result."""
     auth_url = f"{settings.KEYCLOAK_URL}/protocol/openid-connect/userinfo"
-    response = requests.get(
+    response = _HTTP_SESSION.get(
         auth_url,
         headers={"Authorization": f"Bearer {credentials}"},
         timeout=settings.KEYCLOAK_AUTH_TIMEOUT,
     )
     response.raise_for_status()
-    return response.json()
+    return orjson.loads(response.content)
 
 
-def is_user_authorized(user_context: UserContext) -> int:
-    """Return the authorization status code."""
-    # pylint: disable=too-many-return-statements
-    if not user_context.token or not user_context.token.credentials:
-        L.info("Missing auth token")
-        return HTTP_401_UNAUTHORIZED
+def _auth_cache_key(credentials: str) -> bytes:
+    """Return the cache key, without keeping the token in memory."""
+    return hashlib.blake2b(credentials.encode(), digest_size=16).digest()
+
+
+def _auth_cache_ttu(key: bytes, value: tuple[int, Any], now: float) -> float:
+    """Return the expiration time of the cached status code.
+
+    Only the authorized and unauthorized status codes are cached, to retry in case of errors.
+    They are cached for AUTH_CACHE_TTL and AUTH_CACHE_FAILURE_TTL seconds at most respectively,
+    without exceeding the token expiration.
+    """
+    status_code, exp = value
+    if status_code == HTTP_200_OK:
+        expiration = now + settings.AUTH_CACHE_TTL
+    elif status_code in {HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN}:
+        expiration = now + settings.AUTH_CACHE_FAILURE_TTL
+    else:
+        return now
+    return min(expiration, exp) if isinstance(exp, int | float) else expiration
+
+
+_AUTH_CACHE_CONDITION = Condition()
+
+
+@cachetools.cached(
+    cache=cachetools.TLRUCache(
+        maxsize=settings.AUTH_CACHE_MAX_SIZE, ttu=_auth_cache_ttu, timer=time.time
+    ),
+    key=_auth_cache_key,
+    lock=_AUTH_CACHE_CONDITION,
+    condition=_AUTH_CACHE_CONDITION,
+    info=settings.AUTH_CACHE_INFO,
+)
+def _authorize(credentials: str) -> tuple[int, Any]:
+    """Return the authorization status code, and the expiration time of the token if available.
+
+    The token is decoded and checked only when it's not found in the cache.
+    """
     try:
-        token_info = jwt.decode(user_context.token.credentials, options={"verify_signature": False})
+        token_info = jwt.decode(credentials, options={"verify_signature": False})
     except jwt.exceptions.DecodeError as ex:
         L.info("Invalid auth token: {}", ex)
-        return HTTP_401_UNAUTHORIZED
+        return HTTP_401_UNAUTHORIZED, None
     user = f"{token_info.get('preferred_username')} [{token_info.get('name')}]"
+    exp = token_info.get("exp")
     try:
-        _response = _get_keycloak_acl(user_context.token.credentials)
+        _response = _get_keycloak_acl(credentials)
     except requests.exceptions.HTTPError as ex:
         status_code = ex.response.status_code
         L.info("User {} not authorized because of the error from Keycloak: {}", user, status_code)
-        return status_code
+        return status_code, exp
     except requests.exceptions.RequestException as ex:
         L.info("User {} not authorized because of the error from Keycloak: {}", user, ex)
-        return HTTP_500_INTERNAL_SERVER_ERROR
+        return HTTP_500_INTERNAL_SERVER_ERROR, exp
     # specific permissions could be checked here
     L.info("User {} authorized", user)
-    return HTTP_200_OK
+    return HTTP_200_OK, exp
+
+
+def is_user_authorized(user_context: UserContext) -> int:
+    """Return the authorization status code."""
+    if not user_context.token or not user_context.token.credentials:
+        L.info("Missing auth token")
+        return HTTP_401_UNAUTHORIZED
+    status_code, _ = _authorize(user_context.token.credentials)
+    return status_code
@@ -2,9 +2,11 @@
 
 from pathlib import Path
 
+import orjson
+
 from app.config import settings
 from app.errors import ClientError
-from app.utils import ensure_list, load_json
+from app.utils import ensure_list
 
 
 def _region_id_to_int(region_id: str) -> int:
@@ -20,7 +22,8 @@ def _region_id_to_int(region_id: str) -> int:
 
 def load_alternative_region_map(path: Path) -> dict:
     """Load a dict from a file containing the json-ld representation of a Brain Region Ontology."""
-    data = load_json(path)
+    # orjson is faster than json when parsing the large ontology file
+    data = orjson.loads(Path(path).read_bytes())
     result = {}
     for item in data["defines"]:
         region_id = item["@id"]
@@ -4,7 +4,7 @@ import os
 import shutil
 import time
 from pathlib import Path
-from threading import Lock
+from threading import Condition
 
 import cachetools
 
@@ -120,18 +120,23 @@ CIRCUIT_CACHE = CircuitCache(
 )
 
 
+_CIRCUIT_CACHE_CONDITION = Condition()
+
+
 @cachetools.cached(
     cache=CIRCUIT_CACHE,
-    lock=Lock(),
+    lock=_CIRCUIT_CACHE_CONDITION,
+    condition=_CIRCUIT_CACHE_CONDITION,
     info=settings.CIRCUIT_CACHE_INFO,
 )
 def _get_sampled_circuit_paths(key: CircuitCacheKey) -> CircuitCachePaths:
     """Return the CircuitCachePaths corresponding to CircuitCacheKey.
 
-    Warning: although the cache is thread safe, if this function is called from different threads,
-    the function body may still be executed multiple times.
+    If this function is called concurrently from different threads with the same key, the function
+    body is executed only once, while the other threads wait for the result.
 
-    Only the first thread will be able to create and populate the cache directory, while the others
+    However, the function body may still be executed in different processes. In that case, only
+    the first process will be able to create and populate the cache directory, while the others
     will wait until it's populated, or time out.
     """
     paths = CircuitCachePaths(base=_circuit_cache_path() / key.checksum())
@@ -40,6 +40,17 @@ class Settings(BaseSettings):
 
     KEYCLOAK_URL: str = "https://example.openbluebrain.com/auth/realms/SBO"
     KEYCLOAK_AUTH_TIMEOUT: float = 10  # in seconds
+    KEYCLOAK_POOL_SIZE: int = 10  # maximum number of connections kept open
+    KEYCLOAK_MAX_RETRIES: int = 2  # in case of connection errors or 502, 503, 504
+
+    # in-memory cache of the authorization results, by token
+    AUTH_CACHE_INFO: bool = False  # hits and misses
+    AUTH_CACHE_MAX_SIZE: int = 1000  # maximum number of tokens
+    AUTH_CACHE_TTL: float = 300  # in seconds, but never after the expiration of the token
+    AUTH_CACHE_FAILURE_TTL: float = 30  # in seconds, for the unauthorized tokens
+
+    # maximum number of threads used by FastAPI to run the sync endpoints and dependencies
+    THREAD_POOL_MAX_WORKERS: int = 64
 
     LOKY_EXECUTOR_ENABLED: bool = True
     LOKY_EXECUTOR_MAX_WORKERS: int = 4  # maximum number of workers
@@ -48,6 +59,16 @@ class Settings(BaseSettings):
     LOKY_EXECUTOR_TIMEOUT: float = 2**31 // 1000
     LOKY_START_METHOD: str = "loky"
 
+    # maximum number of nodes loaded in memory at once when exporting, or 0 to load all of them
+    EXPORT_CHUNK_SIZE: int = 1_000_000
+    # maximum size of the responses returned from memory, without writing them to a temporary file
+    RESPONSE_IN_MEMORY_MAX_SIZE_MB: float = 32
+
+    # in-memory cache of the circuit metadata, invalidated when the circuit config is modified
+    METADATA_CACHE_INFO: bool = False  # hits and misses
+    METADATA_CACHE_MAX_SIZE: int = 1024  # maximum number of items for each function
+    METADATA_CACHE_TTL: float = 3600  # in seconds
+
     # circuit cache saved to disk (ideally RAM disk)
     CIRCUIT_CACHE_INFO: bool = False  # hits and misses
     CIRCUIT_CACHE_MAX_SIZE_MB: float = 400
@@ -1,14 +1,21 @@
 """FastAPI dependencies."""
 
+import hashlib
+import os
 import tempfile
+import uuid
 from collections.abc import Callable, Iterator
 from pathlib import Path
 from typing import Annotated
 
-from fastapi import BackgroundTasks, Depends
+from fastapi import BackgroundTasks, Depends, HTTPException
 from starlette.requests import Request
 from starlette.responses import Response
+from starlette.status import HTTP_304_NOT_MODIFIED
 
+import app.service
+from app.config import settings
+from app.libsonata_helper import get_circuit_files_mtimes
 from app.logger import L
 from app.schemas import CircuitRef, UserContext
 
@@ -44,11 +51,86 @@ def make_temp_path(suffix=None, prefix=None) -> Callable:
     return func
 
 
+def remove_file(path: Path) -> None:
+    """Remove the given file, if it exists."""
+    L.info("Removing file {}", path)
+    path.unlink(missing_ok=True)
+
+
+def make_temp_file(suffix=None, prefix=None) -> Callable:
+    """Return a function that creates a temporary file and remove it at the end.
+
+    It's cheaper than make_temp_path when a single output file is needed. Usage example:
+
+        @app.get("/circuit")
+        def read_circuit(tmp_file: Annotated[Path, Depends(make_temp_file(prefix="output_"))]):
+        ...
+
+    """
+
+    def func(background_tasks: BackgroundTasks) -> Iterator[Path]:
+        """Create a temporary file and remove it at the end."""
+        fd, name = tempfile.mkstemp(suffix=suffix, prefix=prefix)
+        os.close(fd)
+        path = Path(name)
+        background_tasks.add_task(remove_file, path)
+        try:
+            yield path
+        except BaseException:
+            # remove the file in case of unhandled exception
+            remove_file(path)
+            raise
+
+    return func
+
+
+def make_temp_file_path(suffix=None, prefix=None) -> Callable:
+    """Return a function that returns the path of a new temporary file, without creating it.
+
+    It can be used instead of make_temp_file when the file is created only in some cases, to avoid
+    accessing the filesystem in the other cases. The file is removed in case of unhandled
+    exception, otherwise the endpoint must remove it if created. Usage example:
+
+        @app.post("/circuit/query")
+        def query(
+            tmp_file: Annotated[Path, Depends(make_temp_file_path(prefix="output_"))],
+            background_tasks: BackgroundTasks,
+        ):
+            ...
+            background_tasks.add_task(remove_file, tmp_file)
+
+    """
+
+    def func() -> Iterator[Path]:
+        """Return the path of a new temporary file, and remove the file in case of exception."""
+        path = Path(tempfile.gettempdir(), f"{prefix or ''}{uuid.uuid4().hex}{suffix or ''}")
+        try:
+            yield path
+        except BaseException:
+            # remove the file in case of unhandled exception
+            remove_file(path)
+            raise
+
+    return func
+
+
 # dependency aliases
 UserContextDep = Annotated[UserContext, Depends(UserContext)]
 CircuitRefDep = Annotated[CircuitRef, Depends(CircuitRef.from_params)]
 
 
+def get_circuit_config_path(user_context: UserContextDep, circuit_ref: CircuitRefDep) -> Path:
+    """Return the path to the circuit config.
+
+    The result of a dependency is cached by FastAPI for the duration of the request,
+    so the path is resolved only once when it's needed by other dependencies and the endpoint.
+    """
+    return app.service.get_circuit_config_path(circuit_ref, user_context=user_context)
+
+
+CircuitConfigPathDep = Annotated[Path, Depends(get_circuit_config_path)]
+
+
 class CacheControl:
     """Add Cache-Control to the response headers.
 
@@ -72,3 +154,53 @@ class CacheControl:
 
 
 no_cache = CacheControl("no-cache")
+
+
+def check_etag(request: Request, path: Path) -> str | None:
+    """Return the ETag of the response, or raise HTTPException 304 if it's not modified.
+
+    The ETag depends on the request path and query parameters, on the modification time of the
+    circuit config and of the nodes and node sets files referenced by it, and on the version of
+    the app, since the response may depend on bundled data.
+
+    Returns:
+        The ETag, or None if any circuit file cannot be accessed or the method isn't GET.
+    """
+    if request.method != "GET":
+        return None
+    if not (mtimes := get_circuit_files_mtimes(path)):
+        return None
+    query = sorted(request.query_params.multi_items())
+    version = (settings.APP_VERSION, settings.COMMIT_SHA)
+    data = repr((request.url.path, query, mtimes, version))
+    etag = f'"{hashlib.blake2b(data.encode(), digest_size=16).hexdigest()}"'
+    if_none_match = {
+        value.strip().removeprefix("W/")
+        for value in request.headers.get("if-none-match", "").split(",")
+    }
+    # "*" matches any existing resource
+    if etag in if_none_match or "*" in if_none_match:
+        raise HTTPException(status_code=HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return etag
+
+
+def circuit_etag(
+    request: Request,
+    response: Response,
+    path: CircuitConfigPathDep,
+) -> None:
+    """Add the ETag to the response headers, or raise HTTPException 304 if it's not modified.
+
+    It can be used as a dependency in any endpoint returning data from a circuit.
+    The header is set on the Response injected into the dependency, so the endpoint must either
+    return plain data, or return a Response built with a copy of the headers of the injected
+    Response, as done by _json_response. Usage example:
+
+        @app.get("/circuit/count", dependencies=[Depends(circuit_etag)], response_model=dict)
+        def count(response: Response, path: CircuitConfigPathDep, ...) -> Response:
+            ...
+            return _json_response(result, response)
+
+    """
+    if etag := check_etag(request, path):
+        response.headers["ETag"] = etag
@@ -1,14 +1,17 @@
 """Jobs that can be called from the web service or the CLI."""
 
+from collections.abc import Callable, Iterable
 from functools import partial
 from pathlib import Path
 from typing import Any
 
+import pandas as pd
+
 from app import cache, serialize, service
 from app.schemas import CircuitRef, UserContext
 
 
-def read_circuit_job(
+def read_circuit_job(  # noqa: PLR0913, PLR0917
     user_context: UserContext,
     circuit_ref: CircuitRef,
     population_name: str | None,
@@ -20,8 +23,13 @@ def read_circuit_job(
     how: str,
     use_cache: bool,
     output_path: Path,
-) -> None:
-    """Read data from a circuit."""
+    in_memory_max_size: int = 0,
+) -> bytes | None:
+    """Read data from a circuit.
+
+    Return the serialized content if its size in bytes is not greater than in_memory_max_size,
+    otherwise write the content to output_path and return None.
+    """
     # pylint: disable=too-many-arguments
     population_name = population_name or service.get_single_node_population_name(
         circuit_ref, user_context=user_context
@@ -35,11 +43,22 @@ def read_circuit_job(
         seed=seed,
         use_circuit_cache=use_cache,
     )
-    service.export(
+    write: Callable[[Iterable[pd.DataFrame]], bytes | None]
+    if in_memory_max_size > 0:
+        write = partial(
+            serialize.write_chunks_to_memory,
+            attributes=attributes,
+            output_path=output_path,
+            how=how,
+            max_size=in_memory_max_size,
+        )
+    else:
+        write = partial(serialize.write_chunks, attributes=attributes, output=output_path, how=how)
+    return service.export(
         circuit_params=circuit_params,
         queries=queries,
         node_set=node_set,
-        write=partial(serialize.write, attributes=attributes, output_path=output_path, how=how),
+        write=write,
     )
 
 
@@ -1,6 +1,7 @@
 """Libsonata helper functions."""
 
-from collections.abc import Iterable, Iterator, Sequence
+import os
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from functools import lru_cache
 from pathlib import Path
 from typing import Any
@@ -15,12 +16,36 @@ from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
 from app.constants import DTYPES, DYNAMICS_PREFIX
 from app.errors import CircuitError
 from app.logger import L
-from app.utils import dump_json, ensure_dtypes, ensure_list, load_json, run_subprocess
+from app.utils import (
+    dump_json,
+    ensure_dtypes,
+    ensure_list,
+    load_json,
+    prefetch,
+    run_subprocess,
+)
 
 
 def _get_circuit_config_from_file(path: Path | str) -> libsonata.CircuitConfig:
+    """Return libsonata.CircuitConfig from the given path, loaded only if modified.
+
+    Raises:
+        CircuitError, see _load_circuit_config.
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        # the error is raised by libsonata when trying to load the file, and it's not cached
+        mtime_ns = None
+    return _load_circuit_config(str(path), mtime_ns)
+
+
+@lru_cache(maxsize=64)
+def _load_circuit_config(path: str, mtime_ns: int | None) -> libsonata.CircuitConfig:
     """Load and return libsonata.CircuitConfig from the given path.
 
+    The modification time is used only as part of the cache key, to reload the modified files.
+
     Raises:
         CircuitError. Examples of wrapped exceptions:
 
@@ -30,7 +55,7 @@ def _get_circuit_config_from_file(path: Path | str) -> libsonata.CircuitConfig:
         - libsonata.SonataError: Path is not a file (if the config file doesn't exist)
     """
     try:
-        return libsonata.CircuitConfig.from_file(str(path))
+        return libsonata.CircuitConfig.from_file(path)
     except (RuntimeError, libsonata.SonataError) as ex:
         msg = f"Impossible to load the circuit config [{ex}]"
         raise CircuitError(msg, status_code=HTTP_500_INTERNAL_SERVER_ERROR) from ex
@@ -111,12 +136,56 @@ def get_node_populations(
         raise CircuitError(f"Impossible to retrieve the node population(s) [{ex}]") from ex
 
 
+class _NodePopulationNames:
+    """Names and enumeration values of a node population, retrieved from libsonata only once.
+
+    libsonata builds a new set of names at each access to the properties of the node population,
+    and it reads the enumeration values from file at each call of enumeration_values.
+    """
+
+    def __init__(self, node_population: libsonata.NodePopulation) -> None:
+        """Init the object from the given node population."""
+        self._node_population = node_population
+        self.attribute_names = frozenset(node_population.attribute_names)
+        self.enumeration_names = frozenset(node_population.enumeration_names)
+        self.dynamics_attribute_names = frozenset(node_population.dynamics_attribute_names)
+        self._enumeration_values: dict[str, list[str]] = {}
+
+    def enumeration_values(self, name: str) -> list[str]:
+        """Return the values of the given enumeration attribute."""
+        if name not in self._enumeration_values:
+            self._enumeration_values[name] = self._node_population.enumeration_values(name)
+        return self._enumeration_values[name]
+
+
+def _get_attribute(
+    node_population: libsonata.NodePopulation,
+    names: _NodePopulationNames,
+    key: str,
+    selection: libsonata.Selection,
+) -> np.ndarray | pd.Categorical:
+    """Return the values of the given attribute, enumeration, or dynamics attribute."""
+    if key in names.enumeration_names:
+        return pd.Categorical.from_codes(
+            node_population.get_enumeration(key, selection),
+            categories=names.enumeration_values(key),
+        )
+    if key in names.attribute_names:
+        return node_population.get_attribute(key, selection)
+    if key.startswith(DYNAMICS_PREFIX):
+        stripped_key = key.removeprefix(DYNAMICS_PREFIX)
+        if stripped_key in names.dynamics_attribute_names:
+            return node_population.get_dynamics_attribute(stripped_key, selection)
+    raise CircuitError(f"Attribute not found in population {node_population.name}: {key}")
+
+
 def _filter_add_key(
     node_population: libsonata.NodePopulation,
     df: pd.DataFrame,
     key: str,
     values: list[Any],
     keep: bool,
+    names: _NodePopulationNames,
 ) -> pd.DataFrame:
     """Filter a DataFrame based on the given key and values, and add the key as column.
 
@@ -126,51 +195,58 @@ def _filter_add_key(
         key: key to filter.
         values: list of values to filter, or empty to not apply any filter.
         keep: if True, add the filtering key as a column to the DataFrame.
+        names: names of the node population, to be reused across multiple calls.
 
     Returns:
         The filtered DataFrame (it may be a copy, or the original modified DataFrame).
     """
 
-    def _get_attribute(ids: np.ndarray) -> np.ndarray | pd.Categorical:
+    def _get_selection(ids: np.ndarray) -> libsonata.Selection:
         if len(ids) == 0:
-            selection = libsonata.Selection([])
-        elif len(ids) == node_population.size:
+            return libsonata.Selection([])
+        if len(ids) == node_population.size:
             # since the ids are complete and already sorted, this is faster
-            selection = libsonata.Selection([(0, len(ids))])
+            return libsonata.Selection([(0, len(ids))])
+        return libsonata.Selection(ids)
+
+    def _get_positions(attribute: np.ndarray | pd.Categorical) -> np.ndarray:
+        if isinstance(attribute, pd.Categorical):
+            # compare the integer codes instead of the categories
+            wanted = attribute.categories.get_indexer(values)
+            wanted, array = wanted[wanted >= 0], attribute.codes
         else:
-            selection = libsonata.Selection(ids)
-        if key in node_population.enumeration_names:
-            return pd.Categorical.from_codes(
-                node_population.get_enumeration(key, selection),
-                categories=node_population.enumeration_values(key),
-            )
-        if key in node_population.attribute_names:
-            return node_population.get_attribute(key, selection)
-        if key.startswith(DYNAMICS_PREFIX):
-            stripped_key = key.removeprefix(DYNAMICS_PREFIX)
-            if stripped_key in node_population.dynamics_attribute_names:
-                return node_population.get_dynamics_attribute(stripped_key, selection)
-        raise CircuitError(f"Attribute not found in population {node_population.name}: {key}")
+            wanted, array = np.asarray(values), attribute
+        if len(wanted) == 1:
+            return np.flatnonzero(array == wanted[0])
+        return np.flatnonzero(np.isin(array, wanted))
 
     ids = df.index.to_numpy()
-    attribute = _get_attribute(ids)
+    if (
+        values
+        and len(ids)
+        and key in names.enumeration_names
+        and set(names.enumeration_values(key)).isdisjoint(values)
+    ):
+        # none of the values can match, so the attribute doesn't need to be read from file
+        ids = ids[:0]
+        df = df.take([])
+    attribute = _get_attribute(node_population, names, key, _get_selection(ids))
     if values:
-        if len(values) == 1:
-            mask = attribute == values[0]
-        elif isinstance(attribute, pd.Categorical):
-            mask = attribute.isin(np.asarray(values))
-        else:
-            mask = np.isin(attribute, np.asarray(values))
-        ids = ids[mask]
-        attribute = attribute[mask]
-        df = df.loc[ids]
+        positions = _get_positions(attribute)
+        attribute = attribute[positions]
+        df = df.take(positions)
     if keep:
         df[key] = attribute
     return df
 
 
 def _get_sorted_choice(a: np.ndarray | int, sampling_ratio: float, seed: int) -> np.ndarray:
-    """Return an array of sorted integer ids, sampled at sampling_ratio."""
+    """Return an array of sorted integer ids, sampled at sampling_ratio.
+
+    The sampled ids depend only on the seed and on the input, and they must not change across
+    releases, so the sampling algorithm is delegated to numpy. When 'a' is an integer and the
+    sampling ratio is small, numpy uses Floyd's algorithm without allocating the full range.
+    """
     if sampling_ratio >= 1:
         return np.arange(a) if isinstance(a, int) else np.sort(a)
     rng = default_rng(seed)
@@ -178,7 +254,9 @@ def _get_sorted_choice(a: np.ndarray | int, sampling_ratio: float, seed: int) ->
     # if 'a' is an integer, do not build an array from it, because
     # it's more performant to pass an int instead of an array to rng.choice
     ids = rng.choice(a, size=int(full_size * sampling_ratio), replace=False, shuffle=False)
-    return np.sort(ids)
+    # sort in place, since the array returned by rng.choice isn't shared
+    ids.sort()
+    return ids
 
 
 def _init_ids(
@@ -220,36 +298,90 @@ def _init_ids(
     return ids
 
 
-def _build_df_list(
+def _iter_ids_chunks(ids: np.ndarray, chunk_size: int | None) -> Iterator[np.ndarray]:
+    """Yield consecutive chunks of ids, or all the ids at once if chunk_size is None or 0."""
+    if not chunk_size or len(ids) <= chunk_size:
+        yield ids
+        return
+    for start in range(0, len(ids), chunk_size):
+        yield ids[start : start + chunk_size]
+
+
+def _remove_sorted_subset(ids: np.ndarray, subset: np.ndarray) -> np.ndarray:
+    """Return the ids without the ids in subset.
+
+    Both ids and subset must be sorted and unique, and subset must be contained in ids, so that
+    the positions to be removed can be found with a binary search, without sorting the arrays
+    as done by np.setdiff1d.
+    """
+    if len(subset) == 0:
+        return ids
+    mask = np.ones(len(ids), dtype=bool)
+    mask[np.searchsorted(ids, subset)] = False
+    return ids[mask]
+
+
+def _iter_dataframes(
     ids: np.ndarray,
     queries: Sequence[dict[str, Any]] | None,
     node_population: libsonata.NodePopulation,
     attributes: Sequence[str],
-) -> list[pd.DataFrame]:
-    """Build and return a list of DataFrames, one for each query."""
-    df_list: list[pd.DataFrame] = []
+    chunk_size: int | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Build and yield DataFrames, one for each query and chunk of ids.
+
+    The DataFrames are yielded in the same order as the queries, and each query is applied
+    to consecutive chunks of at most chunk_size ids, so that the full result doesn't need
+    to be kept in memory by the consumer.
+    """
     attributes = list(attributes)
     attributes_set = set(attributes)
+    attributes_index = pd.Index(attributes, dtype=object)
+    names = _NodePopulationNames(node_population)
+    selected_ids: list[np.ndarray] = []
     # if queries is empty, an empty query dict is needed to select the attributes
     for num, query_dict in enumerate(queries or [{}], 1):
         L.info("Starting {}", f"filter {num}/{len(queries)}" if queries else "export")
-        if df_list:
+        if selected_ids:
             # remove from ids the ids already selected
-            ids = np.setdiff1d(ids, df_list[-1].index.to_numpy(), assume_unique=True)
+            ids = _remove_sorted_subset(ids, np.concatenate(selected_ids))
+            selected_ids = []
         # Add attributes to the filtering query to load all the required attributes.
         # For better performance, keys that filter out more records should go first.
         query_dict = query_dict | {col: [] for col in attributes if col not in query_dict}  # noqa: PLW2901
-        df = pd.DataFrame(index=ids)
-        for key, values in query_dict.items():
-            values = ensure_list(values) if values else []  # noqa: PLW2901
-            keep = key in attributes_set
-            df = _filter_add_key(node_population, df=df, key=key, values=values, keep=keep)
-            L.info("Filtered by {}={} -> {} ids", key, values or "all", len(df))
-        # reorder the columns if needed
-        if attributes != df.columns.to_list():
-            df = df[attributes]
-        df_list.append(df)
-    return df_list
+        for chunk_ids in _iter_ids_chunks(ids, chunk_size):
+            df = pd.DataFrame(index=chunk_ids)
+            for key, values in query_dict.items():
+                values = ensure_list(values) if values else []  # noqa: PLW2901
+                keep = key in attributes_set
+                df = _filter_add_key(
+                    node_population, df=df, key=key, values=values, keep=keep, names=names
+                )
+                L.info("Filtered by {}={} -> {} ids", key, values or "all", len(df))
+            # reorder the columns if needed
+            if not df.columns.equals(attributes_index):
+                df = df[attributes_index]
+            # save the ids before yielding, because the index may be modified by the consumer
+            selected_ids.append(df.index.to_numpy())
+            yield df
+
+
+def _build_df_list(
+    ids: np.ndarray,
+    queries: Sequence[dict[str, Any]] | None,
+    node_population: libsonata.NodePopulation,
+    attributes: Sequence[str],
+) -> list[pd.DataFrame]:
+    """Build and return a list of DataFrames, one for each query."""
+    return list(_iter_dataframes(ids, queries, node_population, attributes))
+
+
+def _get_all_attribute_names(node_population: libsonata.NodePopulation) -> list[str]:
+    """Return the sorted names of all the attributes and dynamics attributes of a population."""
+    return [
+        *sorted(node_population.attribute_names),
+        *sorted(f"{DYNAMICS_PREFIX}{n}" for n in node_population.dynamics_attribute_names),
+    ]
 
 
 @run_subprocess
@@ -291,10 +423,7 @@ def query_from_file(  # pylint: disable=too-many-arguments
     if attributes is not None:
         selected_attributes = attributes
     else:
-        selected_attributes = [
-            *sorted(node_population.attribute_names),
-            *sorted(f"{DYNAMICS_PREFIX}{n}" for n in node_population.dynamics_attribute_names),
-        ]
+        selected_attributes = _get_all_attribute_names(node_population)
     df_list = _build_df_list(
         ids, queries=queries, node_population=node_population, attributes=selected_attributes
     )
@@ -312,6 +441,124 @@ def query_from_file(  # pylint: disable=too-many-arguments
     return result
 
 
+@run_subprocess
+def export_from_file(  # pylint: disable=too-many-arguments
+    input_path: Path,
+    population_name: str | None,
+    write: Callable[[Iterable[pd.DataFrame]], bytes | None],
+    queries: Sequence[dict[str, Any]] | None = None,
+    node_set: str | None = None,
+    attributes: Sequence[str] | None = None,
+    sampling_ratio: float = 1.0,
+    seed: int = 0,
+    chunk_size: int | None = None,
+) -> bytes | None:
+    """Select the nodes from the given population and queries, and write them in chunks.
+
+    Differently from query_from_file, the nodes are passed to the write function as an iterable
+    of DataFrames without node ids, and they are never concatenated nor returned to the caller.
+    The DataFrames are not sorted by node id, but they are grouped by query.
+
+    Args:
+        input_path: path to the circuit config file.
+        population_name: name of the node population.
+        write: function accepting the iterable of DataFrames to write as a single parameter,
+            and optionally returning the serialized content.
+        queries: list of query dictionaries to select the nodes based on attributes.
+        node_set: name of a node_set to load.
+        attributes: list of attributes to export, or None to export all the attributes.
+        sampling_ratio: sampling_ratio of cells to be considered, expressed as float (0.01 = 1%).
+        seed: random number generator seed.
+        chunk_size: maximum number of ids to be loaded in each DataFrame, or None to not split.
+
+    Returns:
+        The value returned by the write function.
+    """
+    node_population = get_node_population(input_path, population_name)
+    ids = _init_ids(input_path, node_population, seed, node_set, sampling_ratio)
+    if attributes is None:
+        attributes = _get_all_attribute_names(node_population)
+    # read the next chunk while the current chunk is being written
+    return write(
+        prefetch(
+            ensure_dtypes(df.reset_index(drop=True), dtypes=DTYPES)
+            for df in _iter_dataframes(
+                ids,
+                queries=queries,
+                node_population=node_population,
+                attributes=attributes,
+                chunk_size=chunk_size,
+            )
+        )
+    )
+
+
+@run_subprocess
+def get_attribute_values_from_file(
+    input_path: Path,
+    population_name: str | None,
+    attribute_names: Sequence[str] | None = None,
+) -> dict[str, list[str]]:
+    """Return the unique values of the string and enumeration attributes of a node population.
+
+    The values of the enumerations are read from the library, without reading the attributes.
+    The values of the other string attributes are sorted, and they require reading the full
+    attributes. Any other attribute is ignored.
+
+    Args:
+        input_path: path to the circuit config file.
+        population_name: name of the node population.
+        attribute_names: list of attributes to consider, or None to consider all the attributes.
+
+    Returns:
+        A dict containing the unique values of each string and enumeration attribute.
+    """
+    node_population = get_node_population(input_path, population_name)
+    names = _NodePopulationNames(node_population)
+    if attribute_names is None:
+        attribute_names = _get_all_attribute_names(node_population)
+    empty_selection = libsonata.Selection([])
+    result = {}
+    for name in attribute_names:
+        # read an empty selection to check the type without reading the values
+        attribute = _get_attribute(node_population, names, name, empty_selection)
+        if isinstance(attribute, pd.Categorical):
+            result[name] = attribute.categories.to_list()
+        elif attribute.dtype == object:
+            selection = libsonata.Selection([(0, node_population.size)])
+            attribute = _get_attribute(node_population, names, name, selection)
+            # hash based, much faster than np.unique that sorts all the values as python objects
+            result[name] = sorted(pd.unique(attribute).tolist())
+    return result
+
+
+def get_circuit_files_mtimes(input_path: Path) -> tuple[tuple[str, int], ...] | None:
+    """Return the paths and modification times of the files of a circuit.
+
+    The files are the circuit config, followed by the sorted nodes and node sets files
+    referenced by it, so that the result changes whenever any of them is modified.
+
+    Args:
+        input_path: path to the circuit config file.
+
+    Returns:
+        A tuple of (path, mtime_ns), or None if any of the files cannot be accessed.
+    """
+    try:
+        config = _get_circuit_config_from_file(input_path)
+        paths = {
+            config.node_population_properties(name).elements_path
+            for name in config.node_populations
+        }
+        if config.node_sets_path:
+            paths.add(config.node_sets_path)
+        return tuple(
+            (path, os.stat(path).st_mtime_ns) for path in [str(input_path), *sorted(paths)]
+        )
+    except (OSError, CircuitError):
+        return None
+
+
 def get_node_sets(input_path: Path) -> libsonata.NodeSets:
     """Return the libsonata.NodeSets.
 
@@ -371,7 +618,6 @@ def sample_nodes(
             names = names.intersection(attributes)
         yield from sorted(names)
 
-    rng = default_rng(seed)
     str_dt = h5py.special_dtype(vlen=str)
     L.info(
         "Writing file {} for input_path={}, "
@@ -388,10 +634,10 @@ def sample_nodes(
     with h5py.File(output_path, "w") as h5f:
         node_population = get_node_population(input_path, population_name)
         high = len(node_population)
-        ids = rng.choice(high, size=int(high * sampling_ratio), replace=False, shuffle=False)
-        ids.sort()
+        ids = _get_sorted_choice(high, sampling_ratio=sampling_ratio, seed=seed)
         L.info("Sampled ids: {}/{}", len(ids), high)
-        selection = libsonata.Selection(ids)
+        # if all the ids are selected, a single range is faster to build and to read
+        selection = libsonata.Selection([(0, high)] if len(ids) == high else ids)
         sampled_node_ids[population_name] = ids
         population_group = h5f.create_group(f"/nodes/{node_population.name}")
         population_group.create_dataset("node_type_id", data=np.full(len(ids), -1))
@@ -1,18 +1,24 @@
 """Logger configuration."""
 
-import inspect
-import json
+import functools
 import logging
 import sys
 import traceback
+from types import FrameType
 
 import loguru
+import orjson
 from loguru import logger
 
 from app.config import settings
 
 L = logger
 
+# path of the standard logging module, used to skip its frames when looking for the caller
+_LOGGING_FILE = logging.__file__
+# mapping from standard logging level names to Loguru levels
+_LEVEL_CACHE: dict[str, str | int] = {}
+
 
 class InterceptHandler(logging.Handler):
     """Intercept standard logging messages toward Loguru sinks.
@@ -23,15 +29,19 @@ class InterceptHandler(logging.Handler):
     def emit(self, record: logging.LogRecord) -> None:  # noqa: PLR6301
         """Emit a log record."""
         # Get corresponding Loguru level if it exists.
-        level: str | int
-        try:
-            level = L.level(record.levelname).name
-        except ValueError:
-            level = record.levelno
-
-        # Find caller from where originated the logged message.
-        frame, depth = inspect.currentframe(), 0
-        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+        level = _LEVEL_CACHE.get(record.levelname)
+        if level is None:
+            try:
+                level = L.level(record.levelname).name
+            except ValueError:
+                level = record.levelno
+            _LEVEL_CACHE[record.levelname] = level
+
+        # Find caller from where originated the logged message,
+        # starting directly from the frame calling this method.
+        frame: FrameType | None = sys._getframe(1)  # noqa: SLF001
+        depth = 1
+        while frame and frame.f_code.co_filename == _LOGGING_FILE:
             frame = frame.f_back
             depth += 1
 
@@ -54,30 +64,33 @@ def json_formatter(record: "loguru.Record") -> str:
 
     def _serialize(rec: "loguru.Record") -> str:
         subset = {
-            "time": rec["time"].isoformat(),
+            "time": rec["time"],
             "level": rec["level"].name,
             "name": rec["name"],
             "message": rec["message"],
             "extra": rec["extra"],
             "exception": _format_exception(rec["exception"]) if rec["exception"] else None,
         }
-        return json.dumps(subset, separators=(",", ":"), default=str)
+        # the time is timezone aware, so it's serialized by orjson in RFC 3339 format
+        return orjson.dumps(subset, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
 
     record["extra"]["serialized"] = _serialize(record)
     return "{extra[serialized]}\n"
 
 
+@functools.lru_cache(maxsize=128)
+def _str_format(extra_keys: tuple[str, ...]) -> str:
+    """Return the format string including the given extra keys, if any."""
+    extras = f""" [{"|".join(f"{k}={{extra[{k}]}}" for k in extra_keys)}]""" if extra_keys else ""
+    return f"{settings.LOG_FORMAT}{extras}\n{{exception}}"
+
+
 def str_formatter(record: "loguru.Record") -> str:
     """Format a log record including the extra parameters if present.
 
     Return the string to be formatted, not the actual message to be logged.
     """
-    extras = (
-        f""" [{"|".join(f"{k}={{extra[{k}]}}" for k in record["extra"])}]"""
-        if record["extra"]
-        else ""
-    )
-    return f"{settings.LOG_FORMAT}{extras}\n{{exception}}"
+    return _str_format(tuple(record["extra"]))
 
 
 def configure_logging(extra: dict | None = None) -> int:
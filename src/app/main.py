@@ -3,11 +3,12 @@
 import os
 from contextlib import asynccontextmanager
 
+import anyio.to_thread
 from fastapi import FastAPI
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
-from app import service, utils
+from app import auth, service, utils
 from app.api import router
 from app.config import settings
 from app.errors import ClientError
@@ -22,10 +23,13 @@ async def lifespan(_: FastAPI):
         os.getpid(),
         os.cpu_count(),
     )
+    # the sync endpoints are executed in the default thread pool, to not block the event loop
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.THREAD_POOL_MAX_WORKERS
     service.get_bundled_region_map()
     utils.warmup_executors()
     yield
     L.info("Stopping the application")
+    auth.close_http_session()
 
 
 async def client_error_handler(request: Request, exc: ClientError) -> JSONResponse:
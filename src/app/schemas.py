@@ -53,7 +53,8 @@ class ValidatedParams:
 
     def __call__(self, *args, **kwargs):
         """Call the wrapped callable."""
-        signature(self.__call__).bind(*args, **kwargs)
+        # use the signature computed once, since inspecting the signature at each call is slow
+        self.__signature__.bind(*args, **kwargs)
         try:
             return self._callable(*args, **kwargs)
         except ValidationError as e:
@@ -1,60 +1,251 @@
 """Serialization functions."""
 
-from collections.abc import Callable
+import contextlib
+import io
+from collections.abc import Callable, Iterable, Iterator
 from pathlib import Path
-from typing import TypedDict
+from typing import Any, BinaryIO, TypedDict, cast
 
 import pandas as pd
 import pyarrow as pa
-from pyarrow import fs
+import pyarrow.parquet as pq
+
+
+def _to_table(df: pd.DataFrame, attributes: list[str], schema: pa.Schema | None) -> pa.Table:
+    """Convert a DataFrame to a pyarrow Table, using the given schema if specified.
+
+    If the schema isn't specified, the indices of the dictionary (category) columns are converted
+    to int32, so that the same schema can be used for all the chunks, regardless of the number
+    of categories in each chunk.
+    """
+    if schema is not None:
+        # the columns are selected and ordered according to the schema
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    table = pa.Table.from_pandas(df, columns=attributes, preserve_index=False)
+    schema = pa.schema(
+        [
+            field.with_type(pa.dictionary(pa.int32(), field.type.value_type, field.type.ordered))
+            if pa.types.is_dictionary(field.type)
+            else field
+            for field in table.schema
+        ],
+        metadata=table.schema.metadata,
+    )
+    return table.cast(schema)
+
+
+def _non_empty_chunks(chunks: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Yield the non-empty chunks, or only the first chunk if all of them are empty.
+
+    The empty chunks are skipped because the type of the object columns cannot be inferred
+    from them, while the schema of the first written chunk is used for all the chunks.
+    """
+    first_empty: pd.DataFrame | None = None
+    yielded = False
+    for df in chunks:
+        if len(df):
+            yielded = True
+            yield df
+        elif first_empty is None:
+            first_empty = df
+    if not yielded and first_empty is not None:
+        yield first_empty
 
 
 def to_parquet(
-    df: pd.DataFrame, attributes: list[str], output_path: Path, attrs: str | None
+    chunks: Iterable[pd.DataFrame],
+    attributes: list[str],
+    output: Path | BinaryIO,
+    attrs: str | None,
 ) -> None:
-    """Write a DataFrame to file in parquet format."""
+    """Write DataFrames to file in parquet format, one row group at least for each chunk.
+
+    The columns are compressed with zstd, that is faster to decompress and usually produces
+    smaller files than the default snappy compression.
+    """
     # pylint: disable=unused-argument
-    df[attributes].to_parquet(output_path, engine="pyarrow", index=False)
+    writer: pq.ParquetWriter | None = None
+    try:
+        for df in _non_empty_chunks(chunks):
+            table = _to_table(df, attributes, schema=writer.schema if writer else None)
+            if writer is None:
+                writer = pq.ParquetWriter(output, table.schema, compression="zstd")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
 
+def to_json(
+    chunks: Iterable[pd.DataFrame],
+    attributes: list[str],
+    output: Path | BinaryIO,
+    attrs: str | None,
+) -> None:
+    """Write DataFrames to file in JSON format.
 
-def to_json(df: pd.DataFrame, attributes: list[str], output_path: Path, attrs: str | None) -> None:
-    """Write a DataFrame to file in JSON format."""
+    The chunks are concatenated, since the JSON formats cannot be written incrementally,
+    so the whole output is held in memory.
+    """
     orient = attrs or "columns"
-    df[attributes].to_json(output_path, orient=orient)
+    df = pd.concat([df[attributes] for df in _non_empty_chunks(chunks)], ignore_index=True)
+    df.to_json(output, orient=orient)
+
+
+def _extend_categories(
+    chunks: Iterable[pd.DataFrame], attributes: list[str]
+) -> Iterator[pd.DataFrame]:
+    """Yield the chunks, with the categories extended to include the categories of the previous.
 
+    The new categories are appended to the previous ones, so that the dictionaries of the Arrow
+    batches can be written as deltas, since the IPC file format doesn't support replacements.
+    """
+    categories: dict[str, pd.Index] = {}
+    for df in chunks:
+        updates = {}
+        for name in attributes:
+            if not isinstance(df[name].dtype, pd.CategoricalDtype):
+                continue
+            current = df[name].cat.categories
+            previous = categories.setdefault(name, current)
+            if not current.equals(previous):
+                categories[name] = previous.append(current.difference(previous, sort=False))
+                updates[name] = df[name].cat.set_categories(categories[name])
+        yield df.assign(**updates) if updates else df
 
-def to_arrow(df: pd.DataFrame, attributes: list[str], output_path: Path, attrs: str | None) -> None:
-    """Write a DataFrame to file in arrow format."""
+
+def to_arrow(
+    chunks: Iterable[pd.DataFrame],
+    attributes: list[str],
+    output: Path | BinaryIO,
+    attrs: str | None,
+) -> None:
+    """Write DataFrames to file in arrow format, one record batch at least for each chunk.
+
+    The batches are written as soon as they are available, with dictionary deltas when the
+    categories of a chunk are not included in the categories of the previous chunks.
+    """
     # pylint: disable=unused-argument
-    table = pa.Table.from_pandas(df[attributes])
-    with fs.LocalFileSystem().open_output_stream(str(output_path)) as file:
-        with pa.RecordBatchFileWriter(file, table.schema) as writer:
-            writer.write_table(table)
+    options = pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+    writer: pa.ipc.RecordBatchFileWriter | None = None
+    schema: pa.Schema | None = None
+    with (
+        pa.OSFile(str(output), mode="wb")
+        if isinstance(output, str | Path)
+        else contextlib.nullcontext(output)
+    ) as file:
+        try:
+            for df in _extend_categories(_non_empty_chunks(chunks), attributes):
+                table = _to_table(df, attributes, schema=schema)
+                if writer is None:
+                    schema = table.schema
+                    writer = pa.ipc.new_file(file, schema, options=options)
+                writer.write_table(table)
+        finally:
+            if writer is not None:
+                writer.close()
 
 
-def write(df: pd.DataFrame, attributes: list[str], output_path: Path, how: str) -> None:
-    """Write a DataFrame to file."""
+def write_chunks(
+    chunks: Iterable[pd.DataFrame], attributes: list[str], output: Path | BinaryIO, how: str
+) -> None:
+    """Write the DataFrames yielded by chunks to a single file or binary stream."""
     how, _, attrs = how.partition(":")
     serializer = SERIALIZERS[how]["function"]
-    serializer(df, attributes, output_path, attrs)
+    serializer(chunks, attributes, output, attrs)
+
+
+class _RolloverWriter(io.RawIOBase):
+    """Binary stream kept in memory until its size exceeds max_size, then written to file.
+
+    When the size is exceeded, the file is created and the content written so far is moved
+    from memory to the file, and the following writes go directly to the file.
+    The file must not exist, so that it's never created when the content fits in memory.
+    """
+
+    def __init__(self, path: Path, max_size: int) -> None:
+        """Init the stream with the path of the file and the maximum size in memory."""
+        super().__init__()
+        self._path = path
+        self._max_size = max_size
+        self._buffer = io.BytesIO()
+        self._file: BinaryIO | None = None
+        self._size = 0
+
+    def writable(self) -> bool:
+        """Return True, since the stream is writable."""
+        return True
+
+    def write(self, b: Any) -> int:
+        """Write the given bytes-like object, and return the number of bytes written."""
+        size = memoryview(b).nbytes
+        if self._file is None and self._size + size > self._max_size:
+            # pylint: disable=consider-using-with
+            self._file = open(self._path, "xb")
+            with self._buffer.getbuffer() as view:
+                self._file.write(view)
+            self._buffer.close()
+        if self._file is not None:
+            self._file.write(b)
+        else:
+            self._buffer.write(b)
+        self._size += size
+        return size
+
+    def tell(self) -> int:
+        """Return the number of bytes written."""
+        return self._size
+
+    def getvalue(self) -> bytes | None:
+        """Return the content if it's still in memory, or None if it has been written to file."""
+        return None if self._file is not None else self._buffer.getvalue()
+
+    def close(self) -> None:
+        """Close the stream, and the file if it has been opened."""
+        if self._file is not None:
+            self._file.close()
+        self._buffer.close()
+        super().close()
+
+
+def write_chunks_to_memory(
+    chunks: Iterable[pd.DataFrame],
+    attributes: list[str],
+    output_path: Path,
+    how: str,
+    max_size: int,
+) -> bytes | None:
+    """Serialize the DataFrames yielded by chunks in memory.
+
+    Return the serialized content if its size in bytes is not greater than max_size,
+    otherwise write the content to output_path and return None.
+    The content is moved to output_path as soon as max_size is exceeded, so that no more than
+    max_size bytes of serialized content are kept in memory.
+    """
+    with _RolloverWriter(output_path, max_size=max_size) as output:
+        write_chunks(chunks, attributes=attributes, output=cast(BinaryIO, output), how=how)
+        return output.getvalue()
+
+
+def write(df: pd.DataFrame, attributes: list[str], output_path: Path, how: str) -> None:
+    """Write a DataFrame to file."""
+    write_chunks([df], attributes=attributes, output=output_path, how=how)
 
 
 def get_content_type(how: str) -> str:
     """Return the content-type corresponding to the given type."""
-    how = how.partition(":")[0]
-    return SERIALIZERS[how]["content_type"]
+    return CONTENT_TYPES[how.partition(":")[0]]
 
 
 def get_extension(how: str) -> str:
     """Return the extension corresponding to the given type."""
-    how = how.partition(":")[0]
-    return SERIALIZERS[how]["extension"]
+    return EXTENSIONS[how.partition(":")[0]]
 
 
 class Serializer(TypedDict):
     """Serializer type."""
 
-    function: Callable[[pd.DataFrame, list[str], Path, str | None], None]
+    function: Callable[[Iterable[pd.DataFrame], list[str], Path | BinaryIO, str | None], None]
     content_type: str
     extension: str
 
@@ -77,5 +268,7 @@ SERIALIZERS: dict[str, Serializer] = {
         "extension": "parquet",
     },
 }
+CONTENT_TYPES = {how: serializer["content_type"] for how, serializer in SERIALIZERS.items()}
+EXTENSIONS = {how: serializer["extension"] for how, serializer in SERIALIZERS.items()}
 SERIALIZERS_REGEX = f"^({'|'.join(SERIALIZERS)})(:.*)?$"
 DEFAULT_SERIALIZER = "arrow"
@@ -4,8 +4,11 @@ import functools
 import importlib.resources
 from collections.abc import Callable, Iterable
 from pathlib import Path
+from threading import Condition
 from typing import Any
 
+import cachetools
+import cachetools.keys
 import numpy as np
 import pandas as pd
 from voxcell import RegionMap
@@ -15,6 +18,9 @@ from app.config import settings
 from app.constants import CIRCUITS
 from app.errors import CircuitError, ClientError
 from app.libsonata_helper import (
+    export_from_file,
+    get_attribute_values_from_file,
+    get_circuit_files_mtimes,
     get_node_population_name,
     get_node_populations,
     get_node_sets,
@@ -85,21 +91,32 @@ def get_alternative_region_map(circuit_ref: CircuitRef, user_context: UserContex
     return get_bundled_alternative_region_map()
 
 
+@functools.lru_cache(maxsize=1024)
+def _find_region_acronyms(region: str, region_map: RegionMap) -> frozenset[str]:
+    """Return the acronyms of the region and its descendants, or an empty set if not found.
+
+    The result is cached because the region map is scanned at each call, and the same regions
+    are usually requested many times, while the region map is loaded only once.
+    """
+    try:
+        ids = region_map.find(int(region), "id", with_descendants=True)
+    except ValueError:
+        ids = region_map.find(region, "acronym", with_descendants=True)
+    return frozenset(region_map.get(id_, "acronym") for id_ in ids)
+
+
 def _region_acronyms(
     regions: list[str], region_map: RegionMap, alternative_region_map: dict
 ) -> list[str]:
     """Return acronyms of regions in `regions`."""
     result: set[str] = set()
     for region in regions:
-        try:
-            ids = region_map.find(int(region), "id", with_descendants=True)
-        except ValueError:
-            ids = region_map.find(region, "acronym", with_descendants=True)
-        if not ids:
-            ids = alternative_region_map.get(region)
-        if not ids:
+        acronyms = _find_region_acronyms(region, region_map)
+        if not acronyms and (ids := alternative_region_map.get(region)):
+            acronyms = frozenset(region_map.get(id_, "acronym") for id_ in ids)
+        if not acronyms:
             raise CircuitError(f"No region ids found with region {region!r}")
-        result.update(region_map.get(id_, "acronym") for id_ in ids)
+        result.update(acronyms)
     return list(result)
 
 
@@ -107,15 +124,19 @@ def export(
     circuit_params: CircuitParams,
     queries: list[dict[str, Any]] | None,
     node_set: str | None,
-    write: Callable[[pd.DataFrame], None],
-) -> None:
-    """Return a DataFrame of nodes attributes.
+    write: Callable[[Iterable[pd.DataFrame]], bytes | None],
+) -> bytes | None:
+    """Write the nodes attributes in chunks, without loading all of them in memory at once.
 
     Args:
         circuit_params: instance of CircuitParams,
         queries: list of query dictionaries.
         node_set: name of a node_set to load.
-        write: function accepting the DataFrame to write as a single parameter.
+        write: function accepting the iterable of DataFrames to write as a single parameter,
+            and optionally returning the serialized content.
+
+    Returns:
+        The value returned by the write function.
     """
     queries = [
         (
@@ -133,20 +154,50 @@ def export(
         for query in queries or []
     ]
     key = circuit_params.key
-    df = query_from_file(
+    return export_from_file(
         input_path=key.circuit_config_path,
         population_name=key.population_name,
+        write=write,
         sampling_ratio=key.sampling_ratio,
         queries=queries,
         node_set=node_set,
         attributes=key.attributes,
         seed=key.seed,
-        sort=False,
-        with_node_ids=False,
+        chunk_size=settings.EXPORT_CHUNK_SIZE,
     )
-    write(df)
 
 
+def _metadata_cache_key(input_path: Path, **kwargs) -> tuple:
+    """Return the cache key, including the modification time of the files of the circuit.
+
+    If any file cannot be accessed, the error is raised when trying to load it, and not cached.
+    """
+    mtimes = get_circuit_files_mtimes(input_path)
+    kwargs = {k: tuple(v) if isinstance(v, list) else v for k, v in kwargs.items()}
+    return cachetools.keys.hashkey(str(input_path), mtimes, **kwargs)
+
+
+def _metadata_cached(func: Callable) -> Callable:
+    """Decorator used to cache the metadata of a circuit.
+
+    The decorated function must be called with keyword arguments only.
+
+    Concurrent calls with the same key wait for the result of the first call,
+    instead of executing the function multiple times.
+    """
+    condition = Condition()
+    return cachetools.cached(
+        cache=cachetools.TTLCache(
+            maxsize=settings.METADATA_CACHE_MAX_SIZE, ttl=settings.METADATA_CACHE_TTL
+        ),
+        key=_metadata_cache_key,
+        lock=condition,
+        condition=condition,
+        info=settings.METADATA_CACHE_INFO,
+    )(func)
+
+
+@_metadata_cached
 def count(input_path: Path, population_name: str | None = None) -> dict:
     """Return the number of nodes per population in the given circuit.
 
@@ -166,6 +217,7 @@ def count(input_path: Path, population_name: str | None = None) -> dict:
     return {"nodes": {"populations": populations}}
 
 
+@_metadata_cached
 def get_attribute_names(
     input_path: Path,
     population_name: str | None = None,
@@ -207,6 +259,7 @@ def get_attribute_names(
     }
 
 
+@_metadata_cached
 def get_attribute_dtypes(
     input_path: Path,
     population_name: str | None = None,
@@ -250,6 +303,7 @@ def get_attribute_dtypes(
     }
 
 
+@_metadata_cached
 def get_attribute_values(
     input_path: Path,
     population_name: str | None = None,
@@ -285,39 +339,16 @@ def get_attribute_values(
         }
     """
     population_names = [population_name] if population_name else None
-    populations: dict[str, dict[str, list[str]]] = {}
-    for node_population in get_node_populations(input_path, population_names):
-        df = query_from_file(
-            input_path=input_path,
-            population_name=node_population.name,
-            attributes=attribute_names,
-            sort=False,
-            with_node_ids=False,
-            ids=np.array([]),
-            dtypes=False,
-        )
-        props = populations[node_population.name] = {}
-        for attribute_name in df.columns:
-            if df.dtypes[attribute_name] == "category":
-                props[attribute_name] = (
-                    df[attribute_name].cat.categories.drop_duplicates().to_list()
-                )
-            elif df.dtypes[attribute_name] == "object":
-                # potentially slow, because it needs to load the full column
-                props[attribute_name] = (
-                    query_from_file(
-                        input_path=input_path,
-                        population_name=node_population.name,
-                        attributes=[attribute_name],
-                        sort=False,
-                        with_node_ids=False,
-                        dtypes=False,
-                    )[attribute_name]
-                    .drop_duplicates()
-                    .sort_values()
-                    .to_list()
-                )
-    return {"populations": populations}
+    return {
+        "populations": {
+            node_population.name: get_attribute_values_from_file(
+                input_path=input_path,
+                population_name=node_population.name,
+                attribute_names=attribute_names,
+            )
+            for node_population in get_node_populations(input_path, population_names)
+        }
+    }
 
 
 def sample(
@@ -341,6 +372,7 @@ def sample(
     )
 
 
+@_metadata_cached
 def get_node_set_names(input_path: Path) -> dict:
     """Return the names of the available node_sets.
 
@@ -4,7 +4,8 @@ import functools
 import json
 import os
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 from pathlib import Path
 from typing import Any
@@ -71,6 +72,22 @@ def get_folder_size(path: Path | str) -> int:
     return total
 
 
+def prefetch[T](iterable: Iterable[T]) -> Iterator[T]:
+    """Yield the items of iterable, while the next item is produced in a background thread.
+
+    It can be used to overlap the production and the consumption of the items, for example when
+    reading and writing chunks of data, provided that at least one of them releases the GIL.
+    The iterable is consumed by a single thread at a time, so it doesn't need to be thread safe.
+    """
+    sentinel: Any = object()
+    iterator = iter(iterable)
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as executor:
+        future = executor.submit(next, iterator, sentinel)
+        while (item := future.result()) is not sentinel:
+            future = executor.submit(next, iterator, sentinel)
+            yield item
+
+
 def with_pid(func: Callable) -> Callable:
     """Decorator used to run a function and log pid and elapsed time."""
 
@@ -133,13 +150,16 @@ def run_subprocess(func: Callable) -> Callable:
 
     Be aware that there may be some overhead to serialize and deserialize parameters and result.
 
-    If LOKY_EXECUTOR_ENABLED is False, then the function is executed in the current process.
+    If LOKY_EXECUTOR_ENABLED is False, then the function is executed in the current process,
+    in the same thread of the caller. Since the sync endpoints are already executed by FastAPI
+    in a pool of threads, this is equivalent to using a thread executor, and it can be preferred
+    when the function releases the GIL, because there isn't any serialization overhead.
     """
+    wrapped_func = with_pid(func)
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         """Execute the wrapped function."""
-        wrapped_func = with_pid(func)
         if settings.LOKY_EXECUTOR_ENABLED:
             return prepare_callable(wrapped_func, *args, **kwargs)()
         else:
@@ -1,11 +1,24 @@
+import inspect
+import os
 import re
+import tempfile
+from unittest.mock import Mock
 
 import libsonata
 import pytest
 
+import app.api.circuit as test_module
+import app.service
+
 from tests.utils import TEST_DATA_DIR, _assert_populations_equal, _get_node_population, edit_json
 
 
+def test_endpoints_are_sync():
+    # the endpoints calling libsonata are blocking, so they must be executed in the thread pool
+    for route in test_module.router.routes:
+        assert not inspect.iscoroutinefunction(route.endpoint), route.path
+
+
 @pytest.mark.usefixtures(
     "_patch_get_circuit_config_path", "_patch_get_region_map", "_patch_get_alternative_region_map"
 )
@@ -31,6 +44,36 @@ async def test_read_circuit(api_client_with_auth, circuit_id):
     }
 
 
+@pytest.mark.usefixtures(
+    "_patch_get_circuit_config_path", "_patch_get_region_map", "_patch_get_alternative_region_map"
+)
+async def test_read_circuit_not_modified(api_client_with_auth, circuit_id):
+    params = {
+        "circuit_id": circuit_id,
+        "population_name": "default",
+        "how": "json",
+        "modality": "position",
+        "seed": 102,
+    }
+    response = await api_client_with_auth.get("/circuit", params=params)
+
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = await api_client_with_auth.get(
+        "/circuit", params=params, headers={"If-None-Match": f"W/{etag}"}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    response = await api_client_with_auth.get(
+        "/circuit", params=params | {"seed": 103}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
 @pytest.mark.usefixtures(
     "_patch_get_circuit_config_path", "_patch_get_region_map", "_patch_get_alternative_region_map"
 )
@@ -103,7 +146,18 @@ async def test_read_circuit_invalid_modality(api_client_with_auth, circuit_id):
 @pytest.mark.usefixtures(
     "_patch_get_circuit_config_path", "_patch_get_region_map", "_patch_get_alternative_region_map"
 )
-async def test_query(api_client_with_auth, circuit_id):
+@pytest.mark.parametrize("in_memory_max_size_mb", [0, 1])
+async def test_query(
+    api_client_with_auth, circuit_id, monkeypatch, tmp_path, in_memory_max_size_mb
+):
+    monkeypatch.setattr(
+        test_module.settings, "RESPONSE_IN_MEMORY_MAX_SIZE_MB", in_memory_max_size_mb
+    )
+    temp_dir = tmp_path / "temp"
+    temp_dir.mkdir()
+    monkeypatch.setattr(tempfile, "tempdir", str(temp_dir))
+    remove_file = Mock(wraps=test_module.remove_file)
+    monkeypatch.setattr(test_module, "remove_file", remove_file)
     response = await api_client_with_auth.post(
         "/circuit/query",
         json={
@@ -118,12 +172,16 @@ async def test_query(api_client_with_auth, circuit_id):
     )
 
     assert response.status_code == 200
+    assert response.headers["Content-Disposition"] == 'attachment; filename="output.json"'
     assert response.json() == {
         "mtype": {"0": "L6_Y"},
         "x": {"0": 201.0},
         "y": {"0": 202.0},
         "z": {"0": 203.0},
     }
+    # the temporary file is created and removed only when the response isn't in memory
+    assert remove_file.call_count == (0 if in_memory_max_size_mb else 1)
+    assert list(temp_dir.iterdir()) == []
 
 
 async def test_query_invalid_key(api_client_with_auth, circuit_id):
@@ -187,6 +245,10 @@ async def test_query_invalid_how(api_client_with_auth, circuit_id):
             {"population_name": "default2"},
             {"default2": [[0, 1], [1, 3]]},
         ),
+        (
+            {"population_name": "default2", "sampling_ratio": 1.0},
+            {"default2": [[0, 1, 2, 3], [0, 1, 2, 3]]},
+        ),
     ],
 )
 async def test_sample(api_client_with_auth, circuit_id, input_path, tmp_path, params, expected):
@@ -222,6 +284,49 @@ async def test_count_all(api_client_with_auth, circuit_id):
     }
 
 
+@pytest.mark.usefixtures("_patch_get_circuit_config_path")
+async def test_count_not_modified(api_client_with_auth, circuit_id):
+    response = await api_client_with_auth.get("/circuit/count", params={"circuit_id": circuit_id})
+
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = await api_client_with_auth.get(
+        "/circuit/count", params={"circuit_id": circuit_id}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    # the circuit config path is resolved only once per request
+    assert app.service.get_circuit_config_path.call_count == 2
+
+
+@pytest.mark.usefixtures("_patch_get_circuit_config_path")
+async def test_count_not_modified_with_wildcard(api_client_with_auth, circuit_id):
+    response = await api_client_with_auth.get(
+        "/circuit/count", params={"circuit_id": circuit_id}, headers={"If-None-Match": "*"}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"]
+
+
+@pytest.mark.usefixtures("_patch_get_circuit_config_path_copy")
+@pytest.mark.parametrize("filename", ["circuit_config.json", "nodes.h5", "node_sets.json"])
+async def test_count_modified(api_client_with_auth, circuit_id, input_path_copy, filename):
+    response = await api_client_with_auth.get("/circuit/count", params={"circuit_id": circuit_id})
+
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    path = input_path_copy.parent / filename
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    response = await api_client_with_auth.get(
+        "/circuit/count", params={"circuit_id": circuit_id}, headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
 @pytest.mark.usefixtures("_patch_get_circuit_config_path")
 async def test_count_population(api_client_with_auth, circuit_id):
     response = await api_client_with_auth.get(
@@ -9,6 +9,7 @@ from fastapi.security import HTTPAuthorizationCredentials
 from httpx import ASGITransport, AsyncClient
 from voxcell import RegionMap
 
+import app.auth
 import app.brain_region
 import app.cache
 import app.libsonata_helper
@@ -156,7 +157,15 @@ def _patch_get_circuit_config_path_copy(monkeypatch, input_path_copy) -> Iterato
 @pytest.fixture(autouse=True)
 def _clear_all_caches() -> Iterator[None]:
     with (
+        clear_cache(app.auth._authorize),
         clear_cache(app.cache._get_sampled_circuit_paths),
         clear_cache(app.libsonata_helper.get_node_population_name),
+        clear_cache(app.libsonata_helper._load_circuit_config),
+        clear_cache(app.service._find_region_acronyms),
+        clear_cache(app.service.count),
+        clear_cache(app.service.get_attribute_names),
+        clear_cache(app.service.get_attribute_dtypes),
+        clear_cache(app.service.get_attribute_values),
+        clear_cache(app.service.get_node_set_names),
     ):
         yield
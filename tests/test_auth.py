@@ -1,4 +1,5 @@
 import logging
+import time
 from unittest.mock import MagicMock
 
 import jwt
@@ -39,9 +40,9 @@ def jwt_token():
 def test_is_user_authorized_true(user_context, jwt_token, monkeypatch, caplog):
     caplog.set_level(logging.INFO)
     mock_response = MagicMock()
-    mock_response.json.return_value = {}
+    mock_response.content = b"{}"
     mock_get = MagicMock(return_value=mock_response)
-    monkeypatch.setattr(test_module.requests, "get", mock_get)
+    monkeypatch.setattr(test_module._HTTP_SESSION, "get", mock_get)
     user_context.token.credentials = jwt_token
 
     result = test_module.is_user_authorized(user_context)
@@ -80,7 +81,7 @@ def test_is_user_authorized_false_because_of_http_error(
         response=MagicMock(status_code=403)
     )
     mock_get = MagicMock(return_value=mock_response)
-    monkeypatch.setattr(test_module.requests, "get", mock_get)
+    monkeypatch.setattr(test_module._HTTP_SESSION, "get", mock_get)
     user_context.token.credentials = jwt_token
 
     result = test_module.is_user_authorized(user_context)
@@ -98,7 +99,7 @@ def test_is_user_authorized_false_because_of_request_exception(
 ):
     caplog.set_level(logging.INFO)
     mock_get = MagicMock(side_effect=requests.exceptions.SSLError("SSL Error"))
-    monkeypatch.setattr(test_module.requests, "get", mock_get)
+    monkeypatch.setattr(test_module._HTTP_SESSION, "get", mock_get)
     user_context.token.credentials = jwt_token
 
     result = test_module.is_user_authorized(user_context)
@@ -109,3 +110,53 @@ def test_is_user_authorized_false_because_of_request_exception(
         in caplog.text
     )
     assert mock_get.call_count == 1
+
+
+def test_create_http_session():
+    session = test_module._create_http_session()
+    adapter = session.get_adapter("https://example.com")
+
+    assert adapter._pool_maxsize == test_module.settings.KEYCLOAK_POOL_SIZE
+    assert adapter.max_retries.total == test_module.settings.KEYCLOAK_MAX_RETRIES
+    assert adapter.max_retries.raise_on_status is False
+    session.close()
+
+
+def test_is_user_authorized_cached(user_context, monkeypatch):
+    mock_response = MagicMock()
+    mock_response.content = b"{}"
+    mock_get = MagicMock(return_value=mock_response)
+    monkeypatch.setattr(test_module._HTTP_SESSION, "get", mock_get)
+    exp = time.time() + 3600
+    user_context.token.credentials = jwt.encode({"exp": exp, "name": "Test User"}, key="")
+    mock_decode = MagicMock(wraps=jwt.decode)
+    monkeypatch.setattr(test_module.jwt, "decode", mock_decode)
+
+    assert test_module.is_user_authorized(user_context) == 200
+    assert test_module.is_user_authorized(user_context) == 200
+    assert mock_get.call_count == 1
+    assert mock_decode.call_count == 1
+    assert test_module._authorize.cache_info().currsize == 1
+
+
+def test_is_user_authorized_not_cached(user_context, monkeypatch):
+    mock_get = MagicMock(side_effect=requests.exceptions.SSLError("SSL Error"))
+    monkeypatch.setattr(test_module._HTTP_SESSION, "get", mock_get)
+    user_context.token.credentials = jwt.encode({"exp": time.time() + 3600}, key="")
+
+    assert test_module.is_user_authorized(user_context) == 500
+    assert test_module.is_user_authorized(user_context) == 500
+    assert mock_get.call_count == 2
+
+
+def test_auth_cache_ttu():
+    now = 1000
+    ttl = test_module.settings.AUTH_CACHE_TTL
+    failure_ttl = test_module.settings.AUTH_CACHE_FAILURE_TTL
+
+    assert test_module._auth_cache_ttu(b"", (200, None), now) == now + ttl
+    assert test_module._auth_cache_ttu(b"", (200, now + 1), now) == now + 1
+    assert test_module._auth_cache_ttu(b"", (200, now + ttl + 1), now) == now + ttl
+    assert test_module._auth_cache_ttu(b"", (403, None), now) == now + failure_ttl
+    assert test_module._auth_cache_ttu(b"", (401, now + 1), now) == now + 1
+    assert test_module._auth_cache_ttu(b"", (500, None), now) == now
@@ -1,15 +1,18 @@
+import os
 import re
 
 import libsonata
 import numpy as np
 import pandas as pd
 import pytest
+from numpy.testing import assert_array_equal
 
 import app.libsonata_helper as test_module
 from app.constants import DTYPES
 from app.errors import CircuitError
+from app.utils import ensure_dtypes
 
-from tests.utils import assert_frame_equal, dump_json, load_json
+from tests.utils import assert_cache, assert_frame_equal, dump_json, load_json
 
 
 def _get_nodes_df(population_name=None):
@@ -65,6 +68,26 @@ def _get_nodes_df(population_name=None):
     return all_dfs[population_name] if population_name else all_dfs
 
 
+def test_get_circuit_config_from_file(input_path_copy):
+    tested_func = test_module._load_circuit_config
+    config = test_module._get_circuit_config_from_file(input_path_copy)
+    assert isinstance(config, libsonata.CircuitConfig)
+    assert test_module._get_circuit_config_from_file(input_path_copy) is config
+    assert_cache(tested_func, hits=1, misses=1, currsize=1)
+
+    # the config is loaded again when the file is modified
+    stat = input_path_copy.stat()
+    os.utime(input_path_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert test_module._get_circuit_config_from_file(input_path_copy) is not config
+    assert_cache(tested_func, hits=1, misses=2, currsize=2)
+
+
+def test_get_circuit_config_from_file_raises(tmp_path):
+    with pytest.raises(CircuitError, match="Impossible to load the circuit config"):
+        test_module._get_circuit_config_from_file(tmp_path / "missing.json")
+    assert_cache(test_module._load_circuit_config, currsize=0)
+
+
 def test_get_node_population_name(input_path_single_population):
     result = test_module.get_node_population_name(input_path_single_population)
 
@@ -117,6 +140,23 @@ def test_get_node_sets_raises_on_non_existent_path(input_path, tmp_path):
         test_module.get_node_sets(new_circuit_path)
 
 
+def test_get_circuit_files_mtimes(input_path):
+    result = test_module.get_circuit_files_mtimes(input_path)
+
+    circuit_dir = input_path.parent
+    paths = [input_path, circuit_dir / "node_sets.json", circuit_dir / "nodes.h5"]
+    assert result == tuple((str(path), os.stat(path).st_mtime_ns) for path in paths)
+
+
+def test_get_circuit_files_mtimes_with_missing_file(input_path, tmp_path):
+    content = load_json(input_path)
+    new_circuit_path = tmp_path / "config.json"
+    dump_json(new_circuit_path, content)
+
+    assert test_module.get_circuit_files_mtimes(new_circuit_path) is None
+    assert test_module.get_circuit_files_mtimes(tmp_path / "missing.json") is None
+
+
 @pytest.mark.parametrize(
     "queries, expected_ids",
     [
@@ -148,6 +188,18 @@ def test_get_node_sets_raises_on_non_existent_path(input_path, tmp_path):
             [{"region": ["SSp2/3", "SSp2"]}],
             [2, 3],
         ),
+        (
+            [{"region": "SSp2"}],
+            [3],
+        ),
+        (
+            [{"region": ["unknown", "SSp2"]}],
+            [3],
+        ),
+        (
+            [{"region": "unknown"}],
+            [],
+        ),
     ],
 )
 def test_query_from_file(input_path, queries, expected_ids):
@@ -239,6 +291,138 @@ def test_query_from_file_with_attributes_empty_list(input_path):
     assert_frame_equal(result, expected, check_column_type=False)
 
 
+@pytest.mark.parametrize("a", [100_000, np.arange(10, 100_010)])
+@pytest.mark.parametrize("sampling_ratio", [0.001, 0.1, 0.9, 1.0])
+def test_get_sorted_choice(a, sampling_ratio):
+    seed = 123
+    result = test_module._get_sorted_choice(a, sampling_ratio=sampling_ratio, seed=seed)
+
+    full_size = a if isinstance(a, int) else len(a)
+    assert len(result) == int(full_size * sampling_ratio)
+    assert np.all(np.diff(result) > 0)
+    if sampling_ratio < 1:
+        # the sampled ids must not change for the same seed
+        rng = np.random.default_rng(seed)
+        expected = np.sort(rng.choice(a, size=len(result), replace=False, shuffle=False))
+        assert_array_equal(result, expected)
+
+
+def test_node_population_names(input_path):
+    node_population = test_module.get_node_population(input_path, "default")
+    result = test_module._NodePopulationNames(node_population)
+
+    assert result.attribute_names == node_population.attribute_names
+    assert result.enumeration_names == node_population.enumeration_names
+    assert result.dynamics_attribute_names == node_population.dynamics_attribute_names
+    for name in node_population.enumeration_names:
+        values = result.enumeration_values(name)
+        assert values == node_population.enumeration_values(name)
+        assert result.enumeration_values(name) is values
+
+
+@pytest.mark.parametrize(
+    "ids, subset, expected",
+    [
+        ([], [], []),
+        ([1, 3, 5], [], [1, 3, 5]),
+        ([1, 3, 5], [1, 3, 5], []),
+        ([1, 3, 5, 8, 13], [3, 13], [1, 5, 8]),
+    ],
+)
+def test_remove_sorted_subset(ids, subset, expected):
+    result = test_module._remove_sorted_subset(
+        np.array(ids, dtype=np.int64), np.array(subset, dtype=np.int64)
+    )
+
+    assert_array_equal(result, expected)
+    assert_array_equal(result, np.setdiff1d(ids, subset))
+
+
+@pytest.mark.parametrize("chunk_size", [None, 1, 2, 10])
+@pytest.mark.parametrize(
+    "queries, expected_ids",
+    [
+        (None, [0, 1, 2, 3]),
+        ([{"mtype": "L8_Y"}], [1, 2]),
+        ([{"mtype": "L7_X"}, {"morphology": "morph-F"}], [0, 2]),
+        ([{"morphology": "morph-F"}, {"mtype": ["L7_X", "L8_Y"]}], [2, 0, 1]),
+    ],
+)
+def test_export_from_file(input_path, queries, expected_ids, chunk_size):
+    chunks = []
+    attributes = ["x", "y", "z", "mtype"]
+
+    test_module.export_from_file(
+        input_path=input_path,
+        population_name="default2",
+        write=chunks.extend,
+        queries=queries,
+        attributes=attributes,
+        sampling_ratio=1.0,
+        seed=0,
+        chunk_size=chunk_size,
+    )
+
+    assert len(chunks) >= len(queries or [{}])
+    assert all(len(df) <= (chunk_size or len(expected_ids)) for df in chunks)
+    result = ensure_dtypes(pd.concat([df for df in chunks if len(df)], ignore_index=True), DTYPES)
+    expected = _get_nodes_df("default2").loc[expected_ids, attributes].reset_index(drop=True)
+    assert_frame_equal(result, ensure_dtypes(expected, dtypes=DTYPES))
+
+
+@pytest.mark.parametrize("values", [["L2"], ["unknown"], ["unknown", "L6"]])
+def test_filter_add_key_enumeration(input_path, values):
+    node_population = test_module.get_node_population(input_path, "default")
+    df = pd.DataFrame(index=np.arange(3))
+
+    names = test_module._NodePopulationNames(node_population)
+
+    result = test_module._filter_add_key(
+        node_population, df=df, key="layer", values=values, keep=True, names=names
+    )
+
+    expected = _get_nodes_df("default")[["layer"]]
+    expected = expected[expected["layer"].isin(values)]
+    assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize(
+    "attribute_names, expected",
+    [
+        (
+            None,
+            {
+                "layer": ["L2", "L7", "L8"],
+                "model_template": ["hoc:small_bio"],
+                "model_type": ["biophysical"],
+                "morphology": ["morph-D", "morph-E", "morph-F", "morph-G"],
+                "mtype": ["L7_X", "L8_Y", "L9_Z"],
+                "other1": ["A", "B", "C", "D"],
+                "region": ["SSp1", "SSp2", "SSp2/3"],
+            },
+        ),
+        (
+            ["mtype", "x", "@dynamics:holding_current"],
+            {"mtype": ["L7_X", "L8_Y", "L9_Z"]},
+        ),
+        ([], {}),
+    ],
+)
+def test_get_attribute_values_from_file(input_path, attribute_names, expected):
+    result = test_module.get_attribute_values_from_file(
+        input_path=input_path, population_name="default2", attribute_names=attribute_names
+    )
+
+    assert {k: sorted(v) for k, v in result.items()} == expected
+
+
+def test_get_attribute_values_from_file_with_missing_attribute(input_path):
+    with pytest.raises(CircuitError, match="Attribute not found in population default2: unknown"):
+        test_module.get_attribute_values_from_file(
+            input_path=input_path, population_name="default2", attribute_names=["unknown"]
+        )
+
+
 @pytest.mark.parametrize("missing", ["unknown", "@dynamics:unknown"])
 def test_query_from_file_with_missing_attribute(input_path, missing):
     pop = "default2"
@@ -1,3 +1,7 @@
+import json
+import logging
+from datetime import datetime
+
 from app import logger as test_module
 
 
@@ -7,3 +11,56 @@ def test_logger_configuration():
         assert handler_id >= 1
     finally:
         test_module.L.remove()
+
+
+def test_json_formatter():
+    records = []
+    handler_id = test_module.L.add(records.append, format=test_module.json_formatter)
+    try:
+        test_module.L.bind(key=1).info("Test message")
+    finally:
+        test_module.L.remove(handler_id)
+
+    assert len(records) == 1
+    result = json.loads(records[0])
+    assert result["level"] == "INFO"
+    assert result["message"] == "Test message"
+    assert result["extra"]["key"] == 1
+    assert result["exception"] is None
+    assert datetime.fromisoformat(result["time"]).tzinfo is not None
+
+
+def test_intercept_handler():
+    records = []
+    handler_id = test_module.L.add(lambda message: records.append(message.record))
+    std_logger = logging.getLogger("test_intercept_handler")
+    std_logger.addHandler(test_module.InterceptHandler())
+    std_logger.propagate = False
+    try:
+        std_logger.warning("Intercepted message")
+        std_logger.log(25, "Custom level message")
+    finally:
+        std_logger.handlers.clear()
+        test_module.L.remove(handler_id)
+
+    assert len(records) == 2
+    assert records[0]["message"] == "Intercepted message"
+    assert records[0]["level"].name == "WARNING"
+    # the caller is the function where the standard logger has been called
+    assert records[0]["function"] == "test_intercept_handler"
+    assert records[1]["level"].no == 25
+    assert records[1]["function"] == "test_intercept_handler"
+
+
+def test_str_formatter():
+    records = []
+    handler_id = test_module.L.add(records.append, format=test_module.str_formatter, colorize=False)
+    try:
+        test_module.L.info("Without extra")
+        test_module.L.bind(key1="a", key2=2).info("With extra")
+    finally:
+        test_module.L.remove(handler_id)
+
+    assert len(records) == 2
+    assert records[0].endswith("Without extra\n")
+    assert records[1].endswith("With extra [key1=a|key2=2]\n")
@@ -1,4 +1,5 @@
 import pytest
+from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import ValidationError
 
@@ -47,3 +48,18 @@ def test_circuit_ref_raises_with_wrong_extension():
 def test_circuit_ref_raises_with_non_existent_path():
     with pytest.raises(ValidationError, match="Path invalid because non existent"):
         test_module.CircuitRef(id=None, path="/path/to/non/existent/circuit_config.json")
+
+
+def test_validated_params():
+    func = test_module.ValidatedParams(test_module.CircuitRef)
+
+    result = func(id="test-id")
+    assert result == test_module.CircuitRef(id="test-id")
+
+    with pytest.raises(TypeError, match="unexpected keyword argument 'invalid'"):
+        func(id="test-id", invalid="value")
+
+    with pytest.raises(HTTPException) as exc_info:
+        func(id=None, path=None)
+    assert exc_info.value.status_code == 422
+    assert exc_info.value.detail[0]["loc"] == ("query",)
@@ -1,5 +1,6 @@
 import pandas as pd
 import pyarrow as pa
+import pyarrow.parquet as pq
 import pytest
 from pandas.testing import assert_frame_equal
 
@@ -74,3 +75,143 @@ def test_write_parquet(tmp_path):
 
     result_df = pd.read_parquet(output_path, engine="pyarrow")
     assert_frame_equal(result_df, df)
+    metadata = pq.read_metadata(output_path)
+    assert metadata.row_group(0).column(0).compression == "ZSTD"
+
+
+@pytest.mark.parametrize("how", ["arrow", "json", "parquet"])
+def test_write_chunks(tmp_path, how):
+    chunks = [
+        pd.DataFrame({"x": [10.5, 11.5], "mtype": pd.Categorical(["L2_X", "L3_Y"])}),
+        pd.DataFrame({"x": [12.5], "mtype": pd.Categorical(["L4_Z"])}),
+        pd.DataFrame({"x": [13.5], "mtype": pd.Categorical([f"L{i}" for i in range(300)])[:1]}),
+    ]
+    expected = pd.DataFrame(
+        {"x": [10.5, 11.5, 12.5, 13.5], "mtype": ["L2_X", "L3_Y", "L4_Z", "L0"]}
+    )
+    output_path = tmp_path / f"output.{how}"
+
+    test_module.write_chunks(
+        chunks=iter(chunks),
+        attributes=["x", "mtype"],
+        output=output_path,
+        how=how,
+    )
+
+    if how == "arrow":
+        with open(output_path, "rb") as source:
+            with pa.ipc.open_file(source) as reader:
+                result_df = reader.read_pandas()
+    elif how == "json":
+        result_df = pd.read_json(output_path)
+    else:
+        result_df = pd.read_parquet(output_path, engine="pyarrow")
+    result_df["mtype"] = result_df["mtype"].astype(object)
+    assert_frame_equal(result_df, expected)
+
+
+def test_write_chunks_arrow_batches(tmp_path):
+    chunks = [
+        pd.DataFrame({"mtype": pd.Categorical(["L2_X", "L3_Y"])}),
+        pd.DataFrame({"mtype": pd.Categorical(["L4_Z", "L2_X"])}),
+        pd.DataFrame({"mtype": pd.Categorical(["L3_Y"], categories=["L3_Y", "L2_X"])}),
+    ]
+    output_path = tmp_path / "output.arrow"
+
+    test_module.write_chunks(
+        chunks=iter(chunks), attributes=["mtype"], output=output_path, how="arrow"
+    )
+
+    with open(output_path, "rb") as source:
+        with pa.ipc.open_file(source) as reader:
+            # each chunk is written as a separate batch, without concatenating the chunks
+            assert reader.num_record_batches == 3
+            result_df = reader.read_pandas()
+    assert result_df["mtype"].cat.categories.tolist() == ["L2_X", "L3_Y", "L4_Z"]
+    assert result_df["mtype"].tolist() == ["L2_X", "L3_Y", "L4_Z", "L2_X", "L3_Y"]
+
+
+@pytest.mark.parametrize("how", ["arrow", "json", "parquet"])
+def test_write_chunks_with_empty_chunks(tmp_path, how):
+    def _chunk(morphology):
+        mtype = pd.Categorical(["L2_X"] * len(morphology), categories=["L2_X"])
+        return pd.DataFrame({"morphology": pd.Series(morphology, dtype=object), "mtype": mtype})
+
+    # the type of the object columns cannot be inferred from the empty chunks
+    chunks = [_chunk([]), _chunk(["morph-A", "morph-B"]), _chunk([]), _chunk(["morph-C"])]
+    expected = pd.DataFrame(
+        {"morphology": ["morph-A", "morph-B", "morph-C"], "mtype": ["L2_X", "L2_X", "L2_X"]}
+    )
+    output_path = tmp_path / f"output.{how}"
+
+    test_module.write_chunks(
+        chunks=iter(chunks),
+        attributes=["morphology", "mtype"],
+        output=output_path,
+        how=how,
+    )
+
+    if how == "arrow":
+        with open(output_path, "rb") as source:
+            with pa.ipc.open_file(source) as reader:
+                result_df = reader.read_pandas()
+    elif how == "json":
+        result_df = pd.read_json(output_path)
+    else:
+        result_df = pd.read_parquet(output_path, engine="pyarrow")
+    result_df["mtype"] = result_df["mtype"].astype(object)
+    assert_frame_equal(result_df, expected)
+
+
+@pytest.mark.parametrize("how", ["arrow", "json", "parquet"])
+def test_write_chunks_all_empty(tmp_path, how):
+    chunks = [pd.DataFrame({"x": pd.Series([], dtype="float32")}) for _ in range(2)]
+    output_path = tmp_path / f"output.{how}"
+
+    test_module.write_chunks(chunks=iter(chunks), attributes=["x"], output=output_path, how=how)
+
+    if how == "arrow":
+        with open(output_path, "rb") as source:
+            with pa.ipc.open_file(source) as reader:
+                result_df = reader.read_pandas()
+    elif how == "json":
+        result_df = pd.read_json(output_path, dtype={"x": "float32"})
+    else:
+        result_df = pd.read_parquet(output_path, engine="pyarrow")
+    assert list(result_df.columns) == ["x"]
+    assert len(result_df) == 0
+
+
+@pytest.mark.parametrize("how", ["arrow", "json", "parquet"])
+@pytest.mark.parametrize("max_size", [0, 100, 10**6])
+def test_write_chunks_to_memory(tmp_path, how, max_size):
+    df = pd.DataFrame({"x": [10.5, 11.5], "mtype": pd.Categorical(["L2_X", "L6_Y"])})
+    output_path = tmp_path / f"output.{how}"
+    expected_path = tmp_path / f"expected.{how}"
+    test_module.write_chunks(chunks=[df], attributes=["x", "mtype"], output=expected_path, how=how)
+
+    result = test_module.write_chunks_to_memory(
+        chunks=[df], attributes=["x", "mtype"], output_path=output_path, how=how, max_size=max_size
+    )
+
+    expected = expected_path.read_bytes()
+    if len(expected) <= max_size:
+        assert result == expected
+        assert not output_path.exists()
+    else:
+        assert result is None
+        assert output_path.read_bytes() == expected
+
+
+@pytest.mark.parametrize(
+    "how, content_type, extension",
+    [
+        ("arrow", "application/vnd.apache.arrow.file", "arrow"),
+        ("json", "application/json", "json"),
+        ("json:records", "application/json", "json"),
+        ("parquet", "application/vnd.apache.parquet", "parquet"),
+    ],
+)
+def test_get_content_type_and_extension(how, content_type, extension):
+    assert test_module.get_content_type(how) == content_type
+    assert test_module.get_extension(how) == extension
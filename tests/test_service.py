@@ -1,3 +1,7 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
@@ -7,7 +11,7 @@ import app.service as test_module
 from app.constants import CIRCUITS
 from app.errors import CircuitError, ClientError
 
-from tests.utils import assert_cache, clear_cache
+from tests.utils import assert_cache, clear_cache, edit_json
 
 
 def test_get_circuit_config_path_from_id(
@@ -114,6 +118,16 @@ def test_region_acronyms(regions, expected, region_map, alternative_region_map):
     assert len(result) == len(expected)
 
 
+def test_region_acronyms_cached(region_map, alternative_region_map):
+    for _ in range(2):
+        result = test_module._region_acronyms(
+            ["838"], region_map=region_map, alternative_region_map=alternative_region_map
+        )
+        assert set(result) == {"SSp-n2/3", "SSp-n2", "SSp-n3"}
+
+    assert_cache(test_module._find_region_acronyms, hits=1, misses=1, currsize=1)
+
+
 @pytest.mark.parametrize(
     "regions",
     [
@@ -128,3 +142,67 @@ def test_region_acronyms_not_found(regions, region_map, alternative_region_map):
         test_module._region_acronyms(
             regions, region_map=region_map, alternative_region_map=alternative_region_map
         )
+
+
+def test_get_node_set_names_cached(input_path_copy):
+    tested_func = test_module.get_node_set_names
+    expected = tested_func(input_path=input_path_copy)
+    assert_cache(tested_func, hits=0, misses=1, currsize=1)
+
+    result = tested_func(input_path=input_path_copy)
+    assert result is expected
+    assert_cache(tested_func, hits=1, misses=1, currsize=1)
+
+    # the cached value is not used when the circuit config is modified
+    stat = input_path_copy.stat()
+    os.utime(input_path_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    result = tested_func(input_path=input_path_copy)
+    assert result == expected
+    assert result is not expected
+    assert_cache(tested_func, hits=1, misses=2, currsize=2)
+
+
+def test_get_node_set_names_cached_node_sets_modified(input_path_copy):
+    tested_func = test_module.get_node_set_names
+    expected = tested_func(input_path=input_path_copy)
+    assert "NewNodeSet" not in expected["node_sets"]
+
+    # the cached value is not used when the node sets file is modified
+    node_sets_path = input_path_copy.parent / "node_sets.json"
+    stat = node_sets_path.stat()
+    with edit_json(node_sets_path) as data:
+        data["NewNodeSet"] = {"layer": "L2"}
+    os.utime(node_sets_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    result = tested_func(input_path=input_path_copy)
+    assert result == {"node_sets": sorted([*expected["node_sets"], "NewNodeSet"])}
+    assert_cache(tested_func, hits=0, misses=2, currsize=2)
+
+
+def test_metadata_cached_missing_circuit_config(tmp_path):
+    tested_func = test_module.count
+    input_path = tmp_path / "circuit_config.json"
+
+    with pytest.raises(CircuitError, match="Impossible to load the circuit config"):
+        tested_func(input_path=input_path)
+    assert_cache(tested_func, hits=0, misses=1, currsize=0)
+
+
+def test_metadata_cached_single_flight(input_path):
+    calls = []
+    barrier = threading.Barrier(4)
+
+    @test_module._metadata_cached
+    def _func(input_path):
+        calls.append(input_path)
+        time.sleep(0.1)
+        return {"result": len(calls)}
+
+    def _run():
+        barrier.wait()
+        return _func(input_path=input_path)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: _run(), range(4)))
+
+    assert calls == [input_path]
+    assert results == [{"result": 1}] * 4
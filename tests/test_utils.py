@@ -62,3 +62,44 @@ def test_attributes_to_dict(attributes, expected):
     result = test_module.attributes_to_dict(**attributes)
 
     assert result == expected
+
+
+def test_prefetch():
+    consumed = []
+
+    def _produce():
+        for i in range(5):
+            consumed.append(i)
+            yield i
+
+    result = test_module.prefetch(_produce())
+    assert next(result) == 0
+    # the next item has been requested in background, before being consumed
+    assert list(result) == [1, 2, 3, 4]
+    assert consumed == [0, 1, 2, 3, 4]
+
+
+def test_prefetch_empty():
+    assert list(test_module.prefetch([])) == []
+
+
+def test_prefetch_raises():
+    def _produce():
+        yield 1
+        raise ValueError("Error in producer")
+
+    result = test_module.prefetch(_produce())
+    assert next(result) == 1
+    with pytest.raises(ValueError, match="Error in producer"):
+        next(result)
+
+
+def test_prefetch_closed_early():
+    def _produce():
+        yield from range(10)
+
+    result = test_module.prefetch(_produce())
+    assert next(result) == 0
+    result.close()
+    with pytest.raises(StopIteration):
+        next(result)